@@ -1,15 +1,19 @@
 import os
+import re
 import sys
 import click
 import functools
 import tempfile
 import subprocess
 import shutil
+import stat
+import string
 from pathlib import Path
 from logging import getLogger
 from .version import VERSION
 
 _log = getLogger(__name__)
+_bufsize = 2 * 1024 * 1024
 
 
 @click.version_option(version=VERSION, prog_name="localpkg")
@@ -41,6 +45,10 @@ def verbose_option(func):
     return click.option("--verbose/--quiet", default=None, help="log level")(wrap)
 
 
+def _default_name() -> str:
+    return Path.cwd().name
+
+
 def base_option(func):
     @click.option("--python-bin", default="python3", show_default=True, help="python to create venv")
     @click.option(
@@ -49,12 +57,37 @@ def base_option(func):
         help="destination binary name of python",
         show_default=True,
     )
-    @click.option("--name", default=Path.cwd().name, show_default=True, help="name of package")
+    @click.option("--name", default=_default_name, show_default="current directory name", help="name of package")
     @click.option("--compile/--no-compile", default=False, show_default=True, help="compile .py to .pyc")
     @click.option("--zip/--no-zip", default=False, show_default=True, help="use zipimport")
+    @click.option(
+        "--zip-format",
+        type=click.Choice(["deflate", "zstd"]),
+        default="deflate",
+        show_default=True,
+        help="zip compression method (zstd requires python 3.14+)",
+    )
+    @click.option(
+        "--zip-level",
+        type=click.IntRange(0, 22),
+        help="zip compression level (deflate: 1=fastest, 6=balanced(default), 9=archival;"
+        " zstd: 3=fast, 15=balanced(default))",
+    )
+    @click.option(
+        "--fast/--no-fast",
+        default=False,
+        show_default=True,
+        help="disable pip build isolation (build dependencies must be installed)",
+    )
+    @click.option("--index-url", help="base URL of the python package index")
+    @click.option("--find-links", multiple=True, help="URL or path to look for packages")
     @click.argument("args", nargs=-1, required=True)
     @functools.wraps(func)
     def _(*a, **kw):
+        if kw["zip"] and kw["zip_format"] == "deflate" and (kw["zip_level"] or 0) > 9:
+            raise click.BadParameter(
+                f"{kw['zip_level']} is not in the range 0<=x<=9 for deflate", param_hint="'--zip-level'"
+            )
         return func(*a, **kw)
 
     return _
@@ -70,6 +103,35 @@ def package_option(func):
     return _
 
 
+def tmpdir_option(func):
+    @click.option(
+        "--tmpdir",
+        type=click.Path(exists=True, file_okay=False, dir_okay=True),
+        envvar="LOCALPKG_TMPDIR",
+        help="working directory [default: /dev/shm or $XDG_RUNTIME_DIR if available]",
+    )
+    @functools.wraps(func)
+    def _(*a, **kw):
+        return func(*a, **kw)
+
+    return _
+
+
+def _tmpdir(tmpdir: str | None = None) -> tempfile.TemporaryDirectory:
+    if tmpdir is None:
+        for c in ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR")):
+            if not c or not os.path.isdir(c) or not os.access(c, os.W_OK):
+                continue
+            st = os.statvfs(c)
+            if st.f_bavail * st.f_frsize < 1024 * 1024 * 1024:
+                _log.debug("skip tmpdir(too small): %s", c)
+                continue
+            tmpdir = c
+            break
+    _log.debug("tmpdir: %s", tmpdir)
+    return tempfile.TemporaryDirectory(dir=tmpdir)
+
+
 def _venv(python_bin, output_dir) -> Path:
     _log.debug("make venv to %s", output_dir)
     cmdres = subprocess.run([python_bin, "-m", "venv", "--system-site-packages", output_dir])
@@ -77,21 +139,58 @@ def _venv(python_bin, output_dir) -> Path:
     return Path(output_dir) / "bin" / "pip"
 
 
+def _cache_dir() -> Path:
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "localpkg"
+
+
+def _cached_venv(python_bin) -> Path:
+    import fcntl
+    import hashlib
+
+    res = subprocess.run([python_bin, "-c", "import sys; print(sys.executable, sys.version)"], capture_output=True)
+    res.check_returncode()
+    venvdir = _cache_dir() / f"venv-{hashlib.sha256(res.stdout).hexdigest()[:16]}"
+    venvdir.parent.mkdir(parents=True, exist_ok=True)
+    with open(venvdir.with_suffix(".lock"), "w") as lockfp:
+        fcntl.flock(lockfp, fcntl.LOCK_EX)
+        vpip_bin = venvdir / "bin" / "pip"
+        if vpip_bin.exists() and subprocess.run([vpip_bin, "--version"], capture_output=True).returncode == 0:
+            _log.debug("reuse venv: %s", venvdir)
+            return vpip_bin
+        shutil.rmtree(venvdir, ignore_errors=True)
+        return _venv(python_bin, venvdir)
+
+
 def _envvars(user_base) -> dict:
     _log.debug("make environ: userbase=%s", user_base)
     keepenv = {"http_proxy", "https_proxy", "no_proxy"}
     env = {k: v for k, v in os.environ.items() if k in keepenv}
     env["PYTHONUSERBASE"] = user_base
+    env["PIP_CACHE_DIR"] = os.environ.get("PIP_CACHE_DIR") or str(_cache_dir() / "pip")
     return env
 
 
-def _pip_install(vpip_bin: Path, compile: bool, args: tuple[str], env: dict):
-    _log.info("install: %s (compile=%s, pip=%s)", args, compile, vpip_bin)
+def _pip_install(
+    vpip_bin: Path,
+    compile: bool,
+    args: tuple[str],
+    env: dict,
+    fast: bool = False,
+    index_url: str | None = None,
+    find_links: tuple[str] = (),
+):
+    _log.info("install: %s (compile=%s, fast=%s, pip=%s)", args, compile, fast, vpip_bin)
     basearg = ["--disable-pip-version-check"]
     if compile:
         basearg.append("--compile")
     else:
         basearg.append("--no-compile")
+    if fast:
+        basearg.append("--no-build-isolation")
+    if index_url:
+        basearg.extend(["--index-url", index_url])
+    for link in find_links:
+        basearg.extend(["--find-links", link])
     pipres = subprocess.run([vpip_bin, "install", "--user", *basearg, *args], env=env)
     pipres.check_returncode()
 
@@ -100,53 +199,92 @@ def _fixbin1(fn: Path, pkgdir: Path, python_name: str | None = None):
     _log.info("fix binary: %s pkgdir=%s, python=%s", fn, pkgdir, python_name)
     ofn = str(fn) + ".new"
     try:
-        txt = fn.read_text()
+        with open(fn, "rb") as ifp:
+            if ifp.read(3) != b"#!/":
+                _log.debug("pass(shebang)")
+                return
+            ifp.seek(0)
+            txt = ifp.read().decode()
     except Exception:
         _log.error("failed to read file: %s", fn)
         return
-    if not txt.startswith("#!/"):
-        _log.debug("pass(shebang)")
-        return
     python_name = python_name or "python"
     relpath = str(pkgdir.relative_to(fn, walk_up=True))
     pathadd = r"os.path.abspath(os.path.join(__file__, " + repr(relpath) + "))"
-    with open(ofn, "w") as ofp:
-        for line in txt.splitlines():
-            if line.startswith("#!"):  # shebang
-                ofp.write(f"#! /usr/bin/env {python_name}\n")
-            elif line == "import sys":
-                ofp.write(f"""import os
-import sys
-sys.path.insert(0, {pathadd})
-""")
-            else:
-                ofp.write(line + "\n")
-    os.chmod(ofn, 0o755)
-    os.rename(ofn, fn)
+    newtxt = re.sub(r"\A#![^\r\n]*", lambda _: f"#! /usr/bin/env {python_name}", txt, count=1)
+    newtxt = re.sub(
+        r"^import sys(\r?)$",
+        lambda m: f"import os{m[1]}\nimport sys{m[1]}\nsys.path.insert(0, {pathadd}){m[1]}",
+        newtxt,
+        count=1,
+        flags=re.M,
+    )
+    if newtxt == txt:
+        _log.debug("pass(unchanged)")
+        return
+    try:
+        with open(ofn, "wb") as ofp:
+            ofp.write(newtxt.encode())
+            os.fchmod(ofp.fileno(), 0o755)
+    except Exception:
+        _log.error("failed to write file: %s", ofn)
+        Path(ofn).unlink(missing_ok=True)
+        return
+    os.replace(ofn, fn)
     _log.info("command fixed: %s", fn)
 
 
 def _fixbin(dn: Path, pkgdir: Path, python_name: str | None = None):
-    for file in dn.glob("*"):
-        if file.is_file() and os.access(file, os.X_OK):
-            _fixbin1(file, pkgdir, python_name)
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = [x for x in dn.glob("*") if x.is_file() and os.access(x, os.X_OK)]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for _ in ex.map(lambda x: _fixbin1(x, pkgdir, python_name), files):
+            pass
+
 
+def _zip_compression(zip_format: str = "deflate", zip_level: int | None = None) -> tuple[int, int]:
+    import zipfile
 
-def _fixzip(sitedir: Path, ofn: Path, do_zip: bool = True) -> Path:
+    if zip_format == "zstd":
+        if hasattr(zipfile, "ZIP_ZSTANDARD"):
+            return zipfile.ZIP_ZSTANDARD, 15 if zip_level is None else zip_level
+        _log.warning("zstd is not supported in this python, fallback to deflate")
+        if zip_level is not None and zip_level > 9:
+            zip_level = None
+    if zip_level is None:
+        zip_level = 6
+    return zipfile.ZIP_DEFLATED, zip_level
+
+
+def _fixzip(
+    sitedir: Path,
+    ofn: Path,
+    do_zip: bool = True,
+    level: int = 6,
+    compress_type: int | None = None,
+    exclude_globs: tuple[str, ...] = ("__pycache__/*", "*/__pycache__/*"),
+) -> Path:
+    import fnmatch
     import zipfile
 
+    if compress_type is None:
+        compress_type = zipfile.ZIP_DEFLATED
     if do_zip:
         zf = zipfile.ZipFile(ofn, "w")
         exists = False
         for root, _, files in sitedir.walk():
             for fn in files:
                 path = Path(root) / fn
-                zf.write(
-                    path,
-                    path.relative_to(sitedir),
-                    compress_type=zipfile.ZIP_DEFLATED,
-                    compresslevel=9,
-                )
+                arcname = path.relative_to(sitedir).as_posix()
+                if any(fnmatch.fnmatch(arcname, x) for x in exclude_globs):
+                    _log.debug("exclude from zip: %s", arcname)
+                    continue
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                zinfo.compress_type = compress_type
+                zinfo._compresslevel = level  # same as ZipFile.write (public as compress_level in 3.13+)
+                with open(path, "rb") as src, zf.open(zinfo, "w") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
                 exists = True
                 path.unlink()
         zf.close()
@@ -165,33 +303,138 @@ def _fixzip(sitedir: Path, ofn: Path, do_zip: bool = True) -> Path:
     return newdir
 
 
-def _install(python_bin, destdir, python_name, name, compile, zip, prefix, args):
-    with tempfile.TemporaryDirectory() as tdir:
-        vpip_bin = _venv(python_bin, tdir)
-        destdirp = Path(destdir)
-        bindir = destdirp / prefix / "bin"
-        libdir = destdirp / prefix / "lib"
-        libzip = libdir / f"{name}.zip"
-        sitepkg = libdir / f"python{sys.version_info.major}.{sys.version_info.minor}" / "site-packages"
-        env = _envvars(destdirp / prefix)
-        _pip_install(vpip_bin, compile, args, env)
-        pathname = _fixzip(sitepkg, libzip, do_zip=zip)
-        _fixbin(bindir, pathname, python_name)
-        return pathname
-
-
-def _tar(rootdir: Path, dest: Path, prefix: str):
+def _install(
+    python_bin,
+    destdir,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    prefix,
+    args,
+    fast=False,
+    index_url=None,
+    find_links=(),
+):
+    compress_type = None
+    if zip:
+        compress_type, zip_level = _zip_compression(zip_format, zip_level)
+        if compile:
+            _log.warning("zipimport does not read __pycache__, compiled files are not included in zip")
+    vpip_bin = _cached_venv(python_bin)
+    destdirp = Path(destdir)
+    bindir = destdirp / prefix / "bin"
+    libdir = destdirp / prefix / "lib"
+    libzip = libdir / f"{name}.zip"
+    sitepkg = libdir / f"python{sys.version_info.major}.{sys.version_info.minor}" / "site-packages"
+    env = _envvars(destdirp / prefix)
+    _pip_install(vpip_bin, compile, args, env, fast, index_url, find_links)
+    pathname = _fixzip(sitepkg, libzip, do_zip=zip, level=zip_level, compress_type=compress_type)
+    _fixbin(bindir, pathname, python_name)
+    return pathname
+
+
+def _gzip_command(level: int = 6) -> list[str] | None:
+    for cmd in ("pigz", "gzip"):
+        if shutil.which(cmd):
+            return [cmd, "-n", f"-{level}"]
+    return None
+
+
+def _gnu_tar_command() -> str | None:
+    cmd = shutil.which("tar")
+    if cmd is None:
+        return None
+    res = subprocess.run([cmd, "--version"], capture_output=True, encoding="utf-8")
+    if res.returncode != 0 or "GNU tar" not in res.stdout:
+        _log.debug("not GNU tar: %s", cmd)
+        return None
+    return cmd
+
+
+def _scan_tree(path: str, arcname: str = ""):
+    # regular files and symlinks only, directories are not archived
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_tree(entry.path, arcname + entry.name + "/")
+            elif entry.is_symlink() or entry.is_file(follow_symlinks=False):
+                yield entry, arcname + entry.name
+            else:
+                _log.warning("skip special file: %s", entry.path)
+
+
+def _tar_external(rootdir: Path, dest: Path, prefix: str, level: int = 6, compress: bool = True) -> bool:
+    tar_cmd = _gnu_tar_command()
+    gzip_cmd = _gzip_command(level) if compress else []
+    names = sorted(x for _, x in _scan_tree(str(rootdir)))
+    if tar_cmd is None or gzip_cmd is None or not names:
+        return False
+    if "\n" in prefix:
+        return False
+    escaped = prefix.replace("\\", "\\\\").replace("&", "\\&").replace(",", "\\,")
+    cmd = [tar_cmd, "--owner=root:0", "--group=root:0", "--transform", f"s,^,{escaped},S"]
+    if gzip_cmd:
+        cmd.extend(["--use-compress-program", " ".join(gzip_cmd)])
+    cmd.extend(["-cf", str(Path(dest).absolute()), "-C", str(rootdir)])
+    cmd.extend(["--no-recursion", "--null", "--verbatim-files-from", "-T", "-"])
+    _log.debug("tar command: %s", cmd)
+    subprocess.run(cmd, input="\0".join(names).encode()).check_returncode()
+    return True
+
+
+def _tar(rootdir: Path, dest: Path, prefix: str, level: int = 6, compress: bool = True):
+    import gzip
     import tarfile
 
-    def _filt(input: tarfile.TarInfo) -> tarfile.TarInfo:
-        return input.replace(uid=0, gid=0, uname="root", gname="root", deep=False)
+    if _tar_external(rootdir, dest, prefix, level, compress):
+        return
 
-    with tarfile.open(dest, "w:gz") as tar:
-        for root, _, files in rootdir.walk():
-            rootp = Path(root)
-            for fn in files:
-                name = rootp / fn
-                tar.add(name, prefix + str(name.relative_to(rootdir)), recursive=False, filter=_filt)
+    def _add(tar: tarfile.TarFile):
+        for entry, arcname in _scan_tree(str(rootdir), prefix):
+            st = entry.stat(follow_symlinks=False)
+            ti = tarfile.TarInfo(arcname)
+            ti.mode = stat.S_IMODE(st.st_mode)
+            ti.mtime = int(st.st_mtime)
+            ti.uid, ti.gid, ti.uname, ti.gname = 0, 0, "root", "root"
+            if entry.is_symlink():
+                ti.type = tarfile.SYMTYPE
+                ti.linkname = os.readlink(entry.path)
+                tar.addfile(ti)
+            else:
+                ti.size = st.st_size
+                with open(entry.path, "rb") as ifp:
+                    tar.addfile(ti, ifp)
+
+    if not compress:
+        _log.debug("no compress: %s", dest)
+        with (
+            open(dest, "wb", buffering=_bufsize) as ofp,
+            tarfile.open(fileobj=ofp, mode="w|", copybufsize=_bufsize) as tar,
+        ):
+            _add(tar)
+        return
+    cmd = _gzip_command(level)
+    if cmd is None:
+        _log.debug("compress in-process: %s", dest)
+        with (
+            open(dest, "wb", buffering=_bufsize) as ofp,
+            gzip.GzipFile(fileobj=ofp, mode="wb", compresslevel=level) as gz,
+            tarfile.open(fileobj=gz, mode="w|", copybufsize=_bufsize) as tar,
+        ):
+            _add(tar)
+        return
+    _log.debug("compress with %s: %s", cmd, dest)
+    with (
+        open(dest, "wb") as ofp,
+        subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=ofp, bufsize=_bufsize) as proc,
+        tarfile.open(fileobj=proc.stdin, mode="w|", copybufsize=_bufsize) as tar,
+    ):
+        _add(tar)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
 
 
 @cli.command()
@@ -199,7 +442,21 @@ def _tar(rootdir: Path, dest: Path, prefix: str):
 @base_option
 @click.option("--destdir", type=click.Path(exists=True, file_okay=False, dir_okay=True))
 @click.option("--prefix", default="usr", show_default=True)
-def install(python_bin, destdir, python_name, name, compile, zip, prefix, args):
+def install(
+    python_bin,
+    destdir,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    prefix,
+    args,
+):
     """install to DESTDIR"""
     pathname = _install(
         python_bin=python_bin,
@@ -208,6 +465,11 @@ def install(python_bin, destdir, python_name, name, compile, zip, prefix, args):
         name=name,
         compile=compile,
         zip=zip,
+        zip_format=zip_format,
+        zip_level=zip_level,
+        fast=fast,
+        index_url=index_url,
+        find_links=find_links,
         prefix=prefix,
         args=args,
     )
@@ -217,13 +479,29 @@ def install(python_bin, destdir, python_name, name, compile, zip, prefix, args):
 @cli.command()
 @verbose_option
 @base_option
+@tmpdir_option
 @click.option("--prefix", default="usr", show_default=True)
 @click.option("--version", default="0.0.1", show_default=True)
-def tar(python_bin, python_name, name, compile, zip, version, prefix, args):
+def tar(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    prefix,
+    tmpdir,
+    args,
+):
     """create .tar.gz package"""
     pfx = prefix.strip("/")
     tar_prefix = f"{name}-{version}/{pfx}/"
-    with tempfile.TemporaryDirectory() as work:
+    with _tmpdir(tmpdir) as work:
         workd = Path(work)
         pathname = _install(
             python_bin=python_bin,
@@ -232,6 +510,11 @@ def tar(python_bin, python_name, name, compile, zip, version, prefix, args):
             name=name,
             compile=compile,
             zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
             prefix=pfx,
             args=args,
         )
@@ -240,15 +523,251 @@ def tar(python_bin, python_name, name, compile, zip, version, prefix, args):
         _tar(workd / "usr", src, tar_prefix)
 
 
+def _link1(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _link_tree(src: Path, dst: Path):
+    shutil.copytree(src, dst, symlinks=True, copy_function=_link1)
+
+
+_format_tools = {
+    "deb": ("fakeroot", "dpkg-deb"),
+    "rpm": ("rpmbuild",),
+    "apk": ("abuild",),
+    "pacman": ("makepkg", "debugedit"),
+}
+
+
+_deb_control_tmpl = string.Template("""
+Package: ${name}
+Maintainer: ${maintainer}
+Architecture: all
+Version: ${version}
+Depends: python3
+Description: local package for ${name}
+  use as library: PYTHONPATH=/${pathname}
+""")
+
+
+_rpm_spec_tmpl = string.Template("""
+Summary: local package for ${name}
+Name: ${name}
+Version: ${version}
+Release: 1
+BuildArch: noarch
+License: Unknown
+Packager: ${maintainer}
+Requires: python3
+Source0: %{name}-%{version}.tar
+BuildRoot: %{_tmppath}/%{name}-%{version}-root
+
+%description
+local package for ${name}
+use as library: PYTHONPATH=/${pathname}
+
+%prep
+rm -rf %{buildroot}
+
+%setup -q
+
+%build
+
+%install
+mkdir -p %{buildroot}/usr
+cd usr
+cp -r . %{buildroot}/usr/
+
+%clean
+rm -rf %{buildroot}
+
+%files
+%defattr(-, root, root)
+/usr/*/*
+""")
+
+
+_apkbuild_tmpl = string.Template("""
+# Contributor: ${maintainer}
+# Maintainer: ${maintainer}
+pkgname=${name}
+pkgver=${version}
+pkgrel=1
+pkgdesc="local package for ${name}. if use as library: PYTHONPATH=/${pathname}"
+arch="noarch"
+url="https://github.com/wtnb75/localpkg"
+license="Unknown"
+depends="python3"
+makedepends=""
+install=""
+subpackages=""
+source="${name}-${version}.tar"
+builddir="$$srcdir/$$pkgname-$$pkgver"
+
+prepare() {
+    :
+}
+
+build() {
+    :
+}
+
+check() {
+    :
+}
+
+package() {
+    mkdir -p $${pkgdir}/usr
+    cp -r $${builddir}/usr/ $${pkgdir}/
+}
+""")
+
+
+_pkgbuild_tmpl = string.Template("""
+# mainteiner: ${maintainer}
+pkgname="${name}"
+pkgver="${version}"
+pkgrel="1"
+pkgdesc="local package for ${name}. if use as library: PYTHONPATH=/${pathname}"
+depends=("python")
+license=("unknown")
+source=("${source}")
+sha512sums=("SKIP")
+
+package(){
+    mkdir -p "$${pkgdir}"
+    tar xf $${srcdir}/$${source} -C $${pkgdir}
+    mv $${pkgdir}/*/usr $${pkgdir}
+    rmdir $${pkgdir}/* || true
+}
+""")
+
+
+def _has_tools(fmt: str) -> bool:
+    return all(shutil.which(x) for x in _format_tools[fmt])
+
+
+def _build_deb(workd: Path, pathname: Path, name: str, version: str, maintainer: str):
+    (workd / "DEBIAN").mkdir()
+    (workd / "DEBIAN" / "control").write_text(
+        _deb_control_tmpl.substitute(
+            name=name, version=version, maintainer=maintainer, pathname=pathname.relative_to(workd)
+        )
+    )
+    subprocess.run(["fakeroot", "--", "dpkg-deb", "--root-owner-group", "--build", workd, "."]).check_returncode()
+
+
+def _build_rpm(workd: Path, pathname: Path, name: str, version: str, maintainer: str):
+    for n in ("BUILD", "RPMS", "SOURCES", "SPECS"):
+        (workd / n).mkdir()
+    src = workd / "SOURCES" / f"{name}-{version}.tar"
+    rpm = workd / "RPMS" / "noarch" / f"{name}-{version}-1.noarch.rpm"
+    _tar(workd / "usr", src, f"{name}-{version}/usr/", compress=False)
+    specfn = workd / "SPECS" / f"{name}.spec"
+    specfn.write_text(
+        _rpm_spec_tmpl.substitute(
+            name=name, version=version, maintainer=maintainer, pathname=pathname.relative_to(workd)
+        )
+    )
+    subprocess.run(["rpmbuild", "--define", f"_topdir {workd}", "-bb", specfn]).check_returncode()
+    if not rpm.exists():
+        _log.error("file: %s", list(rpm.parent.glob("*.rpm")))
+    shutil.copy(rpm, ".")
+
+
+def _apk_key(key) -> tuple[str, str]:
+    keytext = Path(key).read_text()
+    res = subprocess.run(["ssh-keygen", "-f", key, "-y"], capture_output=True, encoding="utf-8")
+    res.check_returncode()
+    return keytext, res.stdout.strip()
+
+
+def _apk_env(workd: Path, keytext: str, pubkey: str) -> dict:
+    keyfn = workd / "packager.key"
+    keyfn_p = keyfn.with_name("packager.key.pub")
+    keyfn.write_text(keytext)
+    keyfn_p.write_text(pubkey)
+    env = {"PACKAGER_PRIVKEY": keyfn, "CARCH": "noarch"}
+    subprocess.run(["abuild-sign", "-e"], env=env).check_returncode()
+    return env
+
+
+def _build_apk(workd: Path, pathname: Path, name: str, version: str, maintainer: str, env: dict, output_dir):
+    (workd / "build").mkdir()
+    (workd / "dest").mkdir()
+    src = workd / "build" / f"{name}-{version}.tar"
+    apk = workd / "build" / "APKBUILD"
+    _tar(workd / "usr", src, f"{name}-{version}/usr/", compress=False)
+    apk.write_text(
+        _apkbuild_tmpl.substitute(
+            name=name, version=version, maintainer=maintainer, pathname=pathname.relative_to(workd)
+        )
+    )
+    subprocess.run(["abuild", "checksum"], cwd=workd / "build").check_returncode()
+    build_res = subprocess.run(
+        ["abuild", "-rF", "-P", workd / "dest"],
+        cwd=workd / "build",
+        env=env,
+    )
+    created = False
+    for root, _, files in (workd / "dest").walk():
+        _log.info("files: root=%s, files=%s", root, files)
+        for fn in files:
+            if fn.endswith(".apk"):
+                src = Path(root) / fn
+                _log.info("copy: %s -> %s", src, output_dir)
+                created = True
+                shutil.copy(src, output_dir)
+    if not created:
+        build_res.check_returncode()
+
+
+def _build_pacman(workd: Path, pathname: Path, name: str, version: str, maintainer: str):
+    src = workd / f"{name}-{version}.tar"
+    _tar(workd / "usr", src, f"{name}-{version}/usr/", compress=False)
+    pkgbuild = workd / "PKGBUILD"
+    pkgbuild.write_text(
+        _pkgbuild_tmpl.substitute(
+            name=name,
+            version=version,
+            maintainer=maintainer,
+            pathname=pathname.relative_to(workd),
+            source=src.name,
+        )
+    )
+    subprocess.run(["makepkg", "-A"], cwd=workd).check_returncode()
+    for f in workd.glob("*.pkg.tar.zst"):
+        _log.info("copying package: %s", f)
+        shutil.copy(f, ".")
+
+
 @cli.command()
 @verbose_option
 @base_option
 @package_option
-def deb(python_bin, python_name, name, compile, zip, version, maintainer, args):
+@tmpdir_option
+def deb(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    maintainer,
+    tmpdir,
+    args,
+):
     """create .deb package for debian variants"""
-    assert shutil.which("fakeroot")
-    assert shutil.which("dpkg-deb")
-    with tempfile.TemporaryDirectory() as work:
+    assert _has_tools("deb")
+    with _tmpdir(tmpdir) as work:
         workd = Path(work)
         pathname = _install(
             python_bin=python_bin,
@@ -257,30 +776,41 @@ def deb(python_bin, python_name, name, compile, zip, version, maintainer, args):
             name=name,
             compile=compile,
             zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
             prefix="usr",
             args=args,
         )
-        (workd / "DEBIAN").mkdir()
-        (workd / "DEBIAN" / "control").write_text(f"""
-Package: {name}
-Maintainer: {maintainer}
-Architecture: all
-Version: {version}
-Depends: python3
-Description: local package for {name}
-  use as library: PYTHONPATH=/{pathname.relative_to(workd)}
-""")
-        subprocess.run(["fakeroot", "--", "dpkg-deb", "--root-owner-group", "--build", workd, "."]).check_returncode()
+        _build_deb(workd, pathname, name, version, maintainer)
 
 
 @cli.command()
 @verbose_option
 @base_option
 @package_option
-def rpm(python_bin, python_name, name, compile, zip, version, maintainer, args):
+@tmpdir_option
+def rpm(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    maintainer,
+    tmpdir,
+    args,
+):
     """create .rpm package for redhat variants"""
-    assert shutil.which("rpmbuild")
-    with tempfile.TemporaryDirectory() as work:
+    assert _has_tools("rpm")
+    with _tmpdir(tmpdir) as work:
         workd = Path(work)
         pathname = _install(
             python_bin=python_bin,
@@ -289,83 +819,54 @@ def rpm(python_bin, python_name, name, compile, zip, version, maintainer, args):
             name=name,
             compile=compile,
             zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
             prefix="usr",
             args=args,
         )
-        for n in ("BUILD", "RPMS", "SOURCES", "SPECS"):
-            (workd / n).mkdir()
-        src = workd / "SOURCES" / f"{name}-{version}.tar.gz"
-        rpm = workd / "RPMS" / "noarch" / f"{name}-{version}-1.noarch.rpm"
-        _tar(workd / "usr", src, f"{name}-{version}/usr/")
-        specfn = workd / "SPECS" / f"{name}.spec"
-        specfn.write_text(f"""
-Summary: local package for {name}
-Name: {name}
-Version: {version}
-Release: 1
-BuildArch: noarch
-License: Unknown
-Packager: {maintainer}
-Requires: python3
-Source0: %{{name}}-%{{version}}.tar.gz
-BuildRoot: %{{_tmppath}}/%{{name}}-%{{version}}-root
-
-%description
-local package for {name}
-use as library: PYTHONPATH=/{pathname.relative_to(workd)}
-
-%prep
-rm -rf %{{buildroot}}
-
-%setup -q
-
-%build
-
-%install
-mkdir -p %{{buildroot}}/usr
-cd usr
-cp -r . %{{buildroot}}/usr/
-
-%clean
-rm -rf %{{buildroot}}
-
-%files
-%defattr(-, root, root)
-/usr/*/*
-""")
-        subprocess.run(["rpmbuild", "--define", f"_topdir {workd}", "-bb", specfn]).check_returncode()
-        if not rpm.exists():
-            _log.error("file: %s", list(rpm.parent.glob("*.rpm")))
-        shutil.copy(rpm, ".")
+        _build_rpm(workd, pathname, name, version, maintainer)
 
 
 @cli.command()
 @verbose_option
 @base_option
 @package_option
+@tmpdir_option
 @click.option(
     "--output-dir",
     type=click.Path(file_okay=False, dir_okay=True),
-    default=os.getcwd(),
-    show_default=True,
+    default=os.getcwd,
+    show_default="current directory",
     help="output directory",
 )
 @click.option("--key", type=click.Path(exists=True, dir_okay=False), required=True, help="openssh private key to sign")
-def apk(python_bin, python_name, name, compile, zip, version, maintainer, key, output_dir, args):
+def apk(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    maintainer,
+    key,
+    output_dir,
+    tmpdir,
+    args,
+):
     """create .apk package for alpine linux"""
-    assert shutil.which("abuild")
-    keytext = Path(key).read_text()
-    res = subprocess.run(["ssh-keygen", "-f", key, "-y"], capture_output=True, encoding="utf-8")
-    res.check_returncode()
-    pubkey = res.stdout.strip()
-    with tempfile.TemporaryDirectory() as work:
-        keyfn = Path(work) / "packager.key"
-        keyfn_p = keyfn.with_name("packager.key.pub")
-        keyfn.write_text(keytext)
-        keyfn_p.write_text(pubkey)
-        env = {"PACKAGER_PRIVKEY": keyfn, "CARCH": "noarch"}
-        subprocess.run(["abuild-sign", "-e"], env=env).check_returncode()
+    assert _has_tools("apk")
+    keytext, pubkey = _apk_key(key)
+    with _tmpdir(tmpdir) as work:
         workd = Path(work)
+        env = _apk_env(workd, keytext, pubkey)
         pathname = _install(
             python_bin=python_bin,
             destdir=workd,
@@ -373,76 +874,41 @@ def apk(python_bin, python_name, name, compile, zip, version, maintainer, key, o
             name=name,
             compile=compile,
             zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
             prefix="usr",
             args=args,
         )
-        (workd / "build").mkdir()
-        (workd / "dest").mkdir()
-        src = workd / "build" / f"{name}-{version}.tar.gz"
-        apk = workd / "build" / "APKBUILD"
-        _tar(workd / "usr", src, f"{name}-{version}/usr/")
-        apk.write_text(f"""
-# Contributor: {maintainer}
-# Maintainer: {maintainer}
-pkgname={name}
-pkgver={version}
-pkgrel=1
-pkgdesc="local package for {name}. if use as library: PYTHONPATH=/{pathname.relative_to(workd)}"
-arch="noarch"
-url="https://github.com/wtnb75/localpkg"
-license="Unknown"
-depends="python3"
-makedepends=""
-install=""
-subpackages=""
-source="{name}-{version}.tar.gz"
-builddir="$srcdir/$pkgname-$pkgver"
-
-prepare() {{
-    :
-}}
-
-build() {{
-    :
-}}
-
-check() {{
-    :
-}}
-
-package() {{
-    mkdir -p ${{pkgdir}}/usr
-    cp -r ${{builddir}}/usr/ ${{pkgdir}}/
-}}
-""")
-        subprocess.run(["abuild", "checksum"], cwd=workd / "build").check_returncode()
-        build_res = subprocess.run(
-            ["abuild", "-rF", "-P", workd / "dest"],
-            cwd=workd / "build",
-            env=env,
-        )
-        created = False
-        for root, _, files in (workd / "dest").walk():
-            _log.info("files: root=%s, files=%s", root, files)
-            for fn in files:
-                if fn.endswith(".apk"):
-                    src = Path(root) / fn
-                    _log.info("copy: %s -> %s", src, output_dir)
-                    created = True
-                    shutil.copy(src, output_dir)
-        if not created:
-            build_res.check_returncode()
+        _build_apk(workd, pathname, name, version, maintainer, env, output_dir)
 
 
 @cli.command()
 @verbose_option
 @base_option
 @package_option
-def pacman(python_bin, python_name, name, compile, zip, version, maintainer, args):
+@tmpdir_option
+def pacman(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    maintainer,
+    tmpdir,
+    args,
+):
     """create pacman package for archlinux"""
-    assert shutil.which("makepkg")
-    assert shutil.which("debugedit")
-    with tempfile.TemporaryDirectory() as work:
+    assert _has_tools("pacman")
+    with _tmpdir(tmpdir) as work:
         workd = Path(work)
         pathname = _install(
             python_bin=python_bin,
@@ -451,34 +917,107 @@ def pacman(python_bin, python_name, name, compile, zip, version, maintainer, arg
             name=name,
             compile=compile,
             zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
             prefix="usr",
             args=args,
         )
-        src = workd / f"{name}-{version}.tar.gz"
-        _tar(workd / "usr", src, f"{name}-{version}/usr/")
-        pkgbuild = workd / "PKGBUILD"
-        pkgbuild.write_text(f"""
-# mainteiner: {maintainer}
-pkgname="{name}"
-pkgver="{version}"
-pkgrel="1"
-pkgdesc="local package for {name}. if use as library: PYTHONPATH=/{pathname.relative_to(workd)}"
-depends=("python")
-license=("unknown")
-source=("{src.name}")
-sha512sums=("SKIP")
+        _build_pacman(workd, pathname, name, version, maintainer)
 
-package(){{
-    mkdir -p "${{pkgdir}}"
-    tar xfz ${{srcdir}}/${{source}} -C ${{pkgdir}}
-    mv ${{pkgdir}}/*/usr ${{pkgdir}}
-    rmdir ${{pkgdir}}/* || true
-}}
-""")
-        subprocess.run(["makepkg", "-A"], cwd=workd).check_returncode()
-        for f in workd.glob("*.pkg.tar.zst"):
-            _log.info("copying package: %s", f)
-            shutil.copy(f, ".")
+
+@cli.command(name="all")
+@verbose_option
+@base_option
+@package_option
+@tmpdir_option
+@click.option(
+    "--format",
+    "formats",
+    type=click.Choice(list(_format_tools)),
+    multiple=True,
+    help="package formats to build [default: all formats whose build tool is installed]",
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False, dir_okay=True),
+    default=os.getcwd,
+    show_default="current directory",
+    help="output directory of .apk",
+)
+@click.option("--key", type=click.Path(exists=True, dir_okay=False), help="openssh private key to sign .apk")
+def all_formats(
+    python_bin,
+    python_name,
+    name,
+    compile,
+    zip,
+    zip_format,
+    zip_level,
+    fast,
+    index_url,
+    find_links,
+    version,
+    maintainer,
+    formats,
+    output_dir,
+    key,
+    tmpdir,
+    args,
+):
+    """install once and create packages of multiple formats in parallel"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    formats = list(dict.fromkeys(formats))
+    if not formats:
+        formats = [x for x in _format_tools if _has_tools(x) and (x != "apk" or key)]
+        _log.info("formats: %s", formats)
+    if not formats:
+        raise click.UsageError("no package build tool found")
+    if "apk" in formats and not key:
+        raise click.BadParameter("--key is required to build .apk", param_hint="'--key'")
+    for fmt in formats:
+        assert _has_tools(fmt)
+    keytext, pubkey = _apk_key(key) if "apk" in formats else (None, None)
+    with _tmpdir(tmpdir) as work:
+        workd = Path(work)
+        instd = workd / "install"
+        pathname = _install(
+            python_bin=python_bin,
+            destdir=instd,
+            python_name=python_name,
+            name=name,
+            compile=compile,
+            zip=zip,
+            zip_format=zip_format,
+            zip_level=zip_level,
+            fast=fast,
+            index_url=index_url,
+            find_links=find_links,
+            prefix="usr",
+            args=args,
+        )
+
+        def _build(fmt: str):
+            fmtd = workd / fmt
+            _link_tree(instd, fmtd)
+            fmt_pathname = fmtd / pathname.relative_to(instd)
+            _log.info("build %s: %s", fmt, fmtd)
+            if fmt == "deb":
+                _build_deb(fmtd, fmt_pathname, name, version, maintainer)
+            elif fmt == "rpm":
+                _build_rpm(fmtd, fmt_pathname, name, version, maintainer)
+            elif fmt == "apk":
+                env = _apk_env(fmtd, keytext, pubkey)
+                _build_apk(fmtd, fmt_pathname, name, version, maintainer, env, output_dir)
+            elif fmt == "pacman":
+                _build_pacman(fmtd, fmt_pathname, name, version, maintainer)
+
+        with ThreadPoolExecutor(max_workers=len(formats)) as ex:
+            for _ in ex.map(_build, formats):
+                pass
 
 
 @cli.command()
@@ -1,4 +1,6 @@
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 from click.testing import CliRunner
 from localpkg.main import cli
 
@@ -13,3 +15,55 @@ class TestCLI(unittest.TestCase):
         self.assertIn("deb", res.output)
         self.assertIn("rpm", res.output)
         self.assertIn("tar", res.output)
+
+    def test_help_zip_level(self):
+        res = CliRunner().invoke(cli, ["tar", "--help"])
+        self.assertEqual(0, res.exit_code)
+        self.assertIn("--zip-level", res.output)
+        self.assertIn("--zip-format", res.output)
+        res = CliRunner().invoke(cli, ["tar", "--zip-level", "23", "pkg"])
+        self.assertEqual(2, res.exit_code)
+        res = CliRunner().invoke(cli, ["tar", "--zip", "--zip-format", "deflate", "--zip-level", "10", "pkg"])
+        self.assertEqual(2, res.exit_code)
+        self.assertIn("for deflate", res.output)
+
+    def test_zip_level_without_zip(self):
+        with (
+            patch("localpkg.main._cached_venv"),
+            patch("localpkg.main._pip_install"),
+            patch("localpkg.main._fixzip") as fixzip,
+            patch("localpkg.main._fixbin"),
+            patch("localpkg.main._zip_compression") as zip_compression,
+            patch("localpkg.main._tar"),
+        ):
+            fixzip.side_effect = lambda sitedir, ofn, **kw: ofn.with_suffix("")
+            res = CliRunner().invoke(cli, ["tar", "--zip-level", "10", "pkg"])
+            if res.exception:
+                raise res.exception
+            self.assertEqual(0, res.exit_code)
+            zip_compression.assert_not_called()
+
+    def test_all_apk_without_key(self):
+        res = CliRunner().invoke(cli, ["all", "--format", "deb", "--format", "apk", "pkg"])
+        self.assertEqual(2, res.exit_code)
+        self.assertIn("--key", res.output)
+
+    def test_help_default_name(self):
+        res = CliRunner().invoke(cli, ["deb", "--help"])
+        self.assertEqual(0, res.exit_code)
+        self.assertIn("(current directory", res.output)
+
+    def test_all_duplicated_format(self):
+        with patch("localpkg.main._has_tools", return_value=True), patch("localpkg.main._install") as install:
+
+            def _install(destdir, **kwargs):
+                Path(destdir, "usr", "lib").mkdir(parents=True)
+                return Path(destdir, "usr", "lib", "pkg.zip")
+
+            install.side_effect = _install
+            with patch("localpkg.main._build_deb") as build_deb:
+                res = CliRunner().invoke(cli, ["all", "--format", "deb", "--format", "deb", "pkg"])
+                if res.exception:
+                    raise res.exception
+                self.assertEqual(0, res.exit_code)
+                build_deb.assert_called_once()
@@ -0,0 +1,311 @@
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from localpkg.main import (
+    _apkbuild_tmpl,
+    _cached_venv,
+    _default_name,
+    _envvars,
+    _fixbin,
+    _fixbin1,
+    _fixzip,
+    _gzip_command,
+    _link_tree,
+    _pip_install,
+    _pkgbuild_tmpl,
+    _rpm_spec_tmpl,
+    _tar,
+    _tmpdir,
+)
+
+
+class TestTar(unittest.TestCase):
+    def test_tar(self):
+        self._check_tar()
+
+    def test_tar_pipe(self):
+        if _gzip_command() is None:
+            self.skipTest("no pigz/gzip")
+        with patch("localpkg.main._gnu_tar_command", return_value=None):
+            self._check_tar()
+
+    def test_tar_inprocess(self):
+        with patch("shutil.which", return_value=None):
+            self._check_tar()
+
+    def test_tar_nocompress(self):
+        self._check_tar(compress=False)
+
+    def test_tar_special_prefix(self):
+        for prefix in ("a&b-1/usr/", "a,b-1/usr/", "a\\1b-1/usr/", "a\\\\&,b-1/usr/"):
+            with self.subTest(prefix=prefix):
+                self._check_tar(prefix=prefix)
+
+    def _check_tar(self, compress=True, prefix="hello-0.0.1/usr/"):
+        with tempfile.TemporaryDirectory() as work:
+            workd = Path(work)
+            (workd / "usr" / "bin").mkdir(parents=True)
+            (workd / "usr" / "bin" / "hello").write_text("#! /bin/sh\necho hello\n")
+            (workd / "usr" / "bin" / "hello").chmod(0o755)
+            (workd / "usr" / "bin" / "hello2").symlink_to("hello")
+            (workd / "usr" / "lib" / "python3.12").mkdir(parents=True)
+            (workd / "usr" / "bin" / "-rf").write_text("")
+            dest = workd / "hello-0.0.1.tar.gz"
+            _tar(workd / "usr", dest, prefix, compress=compress)
+            with tarfile.open(dest, "r:gz" if compress else "r:") as tf:
+                files = sorted(tf.getnames())
+                self.assertEqual([prefix + "bin/-rf", prefix + "bin/hello", prefix + "bin/hello2"], files)
+                ti = tf.getmember(prefix + "bin/hello")
+                self.assertEqual((0, 0, "root", "root"), (ti.uid, ti.gid, ti.uname, ti.gname))
+                self.assertEqual(0o755, ti.mode)
+                self.assertEqual(b"#! /bin/sh\necho hello\n", tf.extractfile(ti).read())
+                ti = tf.getmember(prefix + "bin/hello2")
+                self.assertTrue(ti.issym())
+                self.assertEqual("hello", ti.linkname)
+
+
+class TestFixbin(unittest.TestCase):
+    script = """#!/tmp/venv/bin/python
+# -*- coding: utf-8 -*-
+import re
+import sys
+from hello.main import cli
+if __name__ == "__main__":
+    sys.exit(cli())
+"""
+
+    def test_fixbin(self):
+        with tempfile.TemporaryDirectory() as work:
+            bindir = Path(work) / "usr" / "bin"
+            pkgdir = Path(work) / "usr" / "lib" / "hello.zip"
+            bindir.mkdir(parents=True)
+            for i in range(5):
+                (bindir / f"hello{i}").write_text(self.script)
+                (bindir / f"hello{i}").chmod(0o755)
+            (bindir / "data").write_text(self.script)
+            (bindir / "shell").write_text("echo hello\n")
+            (bindir / "shell").chmod(0o755)
+            (bindir / "binary").write_bytes(b"\x7fELF\xff\xfe")
+            (bindir / "binary").chmod(0o755)
+            _fixbin(bindir, pkgdir, "python3")
+            for i in range(5):
+                lines = (bindir / f"hello{i}").read_text().splitlines()
+                self.assertEqual("#! /usr/bin/env python3", lines[0])
+                self.assertIn("import os", lines)
+                self.assertIn(
+                    "sys.path.insert(0, os.path.abspath(os.path.join(__file__, '../../lib/hello.zip')))", lines
+                )
+                self.assertTrue(os.access(bindir / f"hello{i}", os.X_OK))
+            self.assertEqual(self.script, (bindir / "data").read_text())
+            self.assertEqual("echo hello\n", (bindir / "shell").read_text())
+            self.assertEqual(b"\x7fELF\xff\xfe", (bindir / "binary").read_bytes())
+            self.assertEqual([], list(bindir.glob("*.new")))
+
+    def test_fixbin_nonascii(self):
+        with tempfile.TemporaryDirectory() as work:
+            bindir = Path(work) / "usr" / "bin"
+            pkgdir = Path(work) / "usr" / "lib" / "hello.zip"
+            bindir.mkdir(parents=True)
+            script = self.script.replace("# -*- coding: utf-8 -*-", "# \u3053\u3093\u306b\u3061\u306f")
+            (bindir / "hello").write_bytes(script.encode())
+            (bindir / "hello").chmod(0o755)
+            _fixbin(bindir, pkgdir, "python3")
+            txt = (bindir / "hello").read_bytes().decode()
+            self.assertIn("# \u3053\u3093\u306b\u3061\u306f\n", txt)
+            self.assertIn("sys.path.insert(0, ", txt)
+
+    def test_fixbin_write_error(self):
+        with tempfile.TemporaryDirectory() as work:
+            bindir = Path(work) / "usr" / "bin"
+            pkgdir = Path(work) / "usr" / "lib" / "hello.zip"
+            bindir.mkdir(parents=True)
+            (bindir / "hello").write_text(self.script)
+            (bindir / "hello").chmod(0o755)
+            with patch("localpkg.main.os.fchmod", side_effect=OSError("fchmod")):
+                _fixbin(bindir, pkgdir, "python3")
+            self.assertEqual(self.script, (bindir / "hello").read_text())
+            self.assertEqual([], list(bindir.glob("*.new")))
+
+    def test_fixbin_peek(self):
+        reads = []
+
+        def _open(*args, **kwargs):
+            fp = open(*args, **kwargs)
+            read = fp.read
+            fp.read = lambda size=-1: reads.append(size) or read(size)
+            return fp
+
+        with tempfile.TemporaryDirectory() as work:
+            fn = Path(work) / "binary"
+            fn.write_bytes(b"\x7fELF" + b"\0" * 1024 * 1024)
+            fn.chmod(0o755)
+            with patch("localpkg.main.open", _open, create=True):
+                _fixbin1(fn, Path(work) / "hello.zip", "python3")
+            self.assertEqual([3], reads)
+
+    def test_fixbin_crlf(self):
+        with tempfile.TemporaryDirectory() as work:
+            bindir = Path(work) / "usr" / "bin"
+            pkgdir = Path(work) / "usr" / "lib" / "hello.zip"
+            bindir.mkdir(parents=True)
+            (bindir / "hello").write_bytes(self.script.replace("\n", "\r\n").encode())
+            (bindir / "hello").chmod(0o755)
+            _fixbin(bindir, pkgdir, "python3")
+            txt = (bindir / "hello").read_bytes().decode()
+            self.assertTrue(txt.startswith("#! /usr/bin/env python3\r\n"))
+            self.assertIn(
+                "\r\nimport os\r\nimport sys\r\n"
+                "sys.path.insert(0, os.path.abspath(os.path.join(__file__, '../../lib/hello.zip')))\r\n",
+                txt,
+            )
+
+
+class TestFixzip(unittest.TestCase):
+    def test_fixzip(self):
+        with tempfile.TemporaryDirectory() as work:
+            libdir = Path(work) / "usr" / "lib"
+            sitedir = libdir / "python3.12" / "site-packages"
+            (sitedir / "hello").mkdir(parents=True)
+            (sitedir / "hello" / "__init__.py").write_text("print('hello')\n" * 100)
+            (sitedir / "hello" / "__pycache__").mkdir()
+            (sitedir / "hello" / "__pycache__" / "__init__.cpython-312.pyc").write_bytes(b"dummy")
+            ofn = _fixzip(sitedir, libdir / "hello.zip")
+            self.assertEqual(libdir / "hello.zip", ofn)
+            self.assertFalse((libdir / "python3.12").exists())
+            with zipfile.ZipFile(ofn) as zf:
+                self.assertEqual(["hello/__init__.py"], zf.namelist())
+                zinfo = zf.getinfo("hello/__init__.py")
+                self.assertEqual(zipfile.ZIP_DEFLATED, zinfo.compress_type)
+                self.assertLess(zinfo.compress_size, zinfo.file_size)
+                self.assertEqual(b"print('hello')\n" * 100, zf.read(zinfo))
+
+    def test_nozip(self):
+        with tempfile.TemporaryDirectory() as work:
+            libdir = Path(work) / "usr" / "lib"
+            sitedir = libdir / "python3.12" / "site-packages"
+            (sitedir / "hello").mkdir(parents=True)
+            (sitedir / "hello" / "__init__.py").write_text("print('hello')\n")
+            ofn = _fixzip(sitedir, libdir / "hello.zip", do_zip=False)
+            self.assertEqual(libdir / "hello", ofn)
+            self.assertTrue((ofn / "hello" / "__init__.py").exists())
+
+
+class TestVenv(unittest.TestCase):
+    def test_cached_venv(self):
+        with tempfile.TemporaryDirectory() as cache, patch.dict(os.environ, {"XDG_CACHE_HOME": cache}):
+            vpip_bin = _cached_venv(sys.executable)
+            self.assertTrue(vpip_bin.is_relative_to(Path(cache) / "localpkg"))
+            self.assertTrue(vpip_bin.exists())
+            with patch("localpkg.main._venv") as venv:
+                self.assertEqual(vpip_bin, _cached_venv(sys.executable))
+                venv.assert_not_called()
+
+
+class TestPip(unittest.TestCase):
+    def test_pip_install(self):
+        with patch("localpkg.main.subprocess.run") as run:
+            _pip_install(Path("/venv/bin/pip"), False, ("hello",), {}, True, "http://index/simple", ("dir1", "dir2"))
+            run.assert_called_once()
+            self.assertEqual(
+                [
+                    Path("/venv/bin/pip"),
+                    "install",
+                    "--user",
+                    "--disable-pip-version-check",
+                    "--no-compile",
+                    "--no-build-isolation",
+                    "--index-url",
+                    "http://index/simple",
+                    "--find-links",
+                    "dir1",
+                    "--find-links",
+                    "dir2",
+                    "hello",
+                ],
+                run.call_args.args[0],
+            )
+
+    def test_pip_install_default(self):
+        with patch("localpkg.main.subprocess.run") as run:
+            _pip_install(Path("/venv/bin/pip"), True, ("hello",), {})
+            self.assertEqual(
+                [Path("/venv/bin/pip"), "install", "--user", "--disable-pip-version-check", "--compile", "hello"],
+                run.call_args.args[0],
+            )
+
+    def test_envvars(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/cache"}):
+            os.environ.pop("PIP_CACHE_DIR", None)
+            env = _envvars("/userbase")
+            self.assertEqual("/userbase", env["PYTHONUSERBASE"])
+            self.assertEqual("/cache/localpkg/pip", env["PIP_CACHE_DIR"])
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/cache", "PIP_CACHE_DIR": "/pipcache"}):
+            self.assertEqual("/pipcache", _envvars("/userbase")["PIP_CACHE_DIR"])
+
+
+class TestLinkTree(unittest.TestCase):
+    def test_link_tree(self):
+        with tempfile.TemporaryDirectory() as work:
+            src = Path(work) / "src"
+            (src / "usr" / "bin").mkdir(parents=True)
+            (src / "usr" / "bin" / "hello").write_text("hello")
+            (src / "usr" / "bin" / "hello2").symlink_to("hello")
+            _link_tree(src, Path(work) / "dst")
+            dst = Path(work) / "dst"
+            self.assertTrue((dst / "usr" / "bin" / "hello").samefile(src / "usr" / "bin" / "hello"))
+            self.assertTrue((dst / "usr" / "bin" / "hello2").is_symlink())
+
+
+class TestTmpdir(unittest.TestCase):
+    def test_tmpdir(self):
+        with tempfile.TemporaryDirectory() as base:
+            with _tmpdir(base) as work:
+                self.assertEqual(Path(base), Path(work).parent)
+            self.assertFalse(Path(work).exists())
+
+
+class TestTemplate(unittest.TestCase):
+    def test_pkgbuild(self):
+        txt = _pkgbuild_tmpl.substitute(
+            name="hello", version="0.0.1", maintainer="me", pathname="usr/lib/hello.zip", source="hello-0.0.1.tar"
+        )
+        self.assertIn('pkgname="hello"\n', txt)
+        self.assertIn("PYTHONPATH=/usr/lib/hello.zip", txt)
+        self.assertIn('source=("hello-0.0.1.tar")\n', txt)
+        self.assertIn("tar xf ${srcdir}/${source} -C ${pkgdir}\n", txt)
+
+    def test_apkbuild(self):
+        txt = _apkbuild_tmpl.substitute(name="hello", version="0.0.1", maintainer="me", pathname="usr/lib/hello.zip")
+        self.assertIn("pkgname=hello\npkgver=0.0.1\n", txt)
+        self.assertIn("PYTHONPATH=/usr/lib/hello.zip", txt)
+        self.assertIn('source="hello-0.0.1.tar"\n', txt)
+        self.assertIn('builddir="$srcdir/$pkgname-$pkgver"\n', txt)
+        self.assertIn("    mkdir -p ${pkgdir}/usr\n", txt)
+        self.assertIn("    cp -r ${builddir}/usr/ ${pkgdir}/\n", txt)
+
+    def test_rpm_spec(self):
+        txt = _rpm_spec_tmpl.substitute(name="hello", version="0.0.1", maintainer="me", pathname="usr/lib/hello.zip")
+        self.assertIn("Name: hello\nVersion: 0.0.1\n", txt)
+        self.assertIn("Packager: me\n", txt)
+        self.assertIn("Source0: %{name}-%{version}.tar\n", txt)
+        self.assertIn("BuildRoot: %{_tmppath}/%{name}-%{version}-root\n", txt)
+        self.assertIn("use as library: PYTHONPATH=/usr/lib/hello.zip\n", txt)
+
+
+class TestDefaultName(unittest.TestCase):
+    def test_default_name(self):
+        cwd = os.getcwd()
+        try:
+            with tempfile.TemporaryDirectory() as work:
+                for name in ("pkg1", "pkg2"):
+                    (Path(work) / name).mkdir()
+                    os.chdir(Path(work) / name)
+                    self.assertEqual(name, _default_name())
+        finally:
+            os.chdir(cwd)